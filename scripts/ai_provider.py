@@ -6,18 +6,176 @@ This module provides a unified interface for different AI providers (OpenAI and
 to generate release note summaries.
 """
 
+import asyncio
+import contextlib
+import json
 import os
+import random
+import time
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from collections import deque
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Deque, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Retry policy for transient API failures (rate limits, overload, server errors)
+MAX_ATTEMPTS = 5
+BACKOFF_INITIAL = 1.0
+BACKOFF_MAX = 30.0
+# Upper bound on server-requested retry-after delays
+RETRY_AFTER_MAX = 60.0
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+# Seconds between batch job status checks
+BATCH_POLL_INTERVAL = 30
+
+# Default seconds to wait for a batch before cancelling it, well under the 6 h GitHub job limit
+DEFAULT_BATCH_TIMEOUT = 4 * 3600
+
+# Model used per provider when none is configured
+DEFAULT_MODELS = {
+    'openai': "gpt-4o-mini",
+    'claude': "claude-3-haiku-20240307",
+}
+
+class TokenBudgetTracker:
+    """Rolling-window token usage tracker used to stay under a tokens-per-minute limit."""
+    
+    def __init__(self, tokens_per_minute: int, window: float = 60.0):
+        """
+        Initialize the tracker.
+        
+        Args:
+            tokens_per_minute: Token budget per window; 0 disables tracking
+            window: Window length in seconds
+        """
+        self.tokens_per_minute = tokens_per_minute
+        self.window = window
+        self._usage: Deque[Tuple[float, int]] = deque()
+    
+    def _prune(self, now: float) -> None:
+        while self._usage and now - self._usage[0][0] >= self.window:
+            self._usage.popleft()
+    
+    def record(self, tokens: int) -> None:
+        """Record tokens consumed by a completed request."""
+        if self.tokens_per_minute > 0 and tokens:
+            self._usage.append((time.monotonic(), tokens))
+    
+    async def wait(self) -> None:
+        """Wait until the rolling window has budget left for another request."""
+        if self.tokens_per_minute <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self._prune(now)
+            used = sum(tokens for _, tokens in self._usage)
+            if used < self.tokens_per_minute:
+                return
+            delay = self.window - (now - self._usage[0][0])
+            logger.info(f"Token budget exhausted ({used}/{self.tokens_per_minute} TPM), waiting {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Extract the retry-after delay from an API error response, if present."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        delay = float(value) if value else None
+    except ValueError:
+        return None
+    # Negative or NaN values fall back to the computed backoff
+    return delay if delay is not None and delay >= 0 else None
+
 class AIProvider(ABC):
     """Abstract base class for AI providers."""
     
+    # Exception types worth retrying; set by subclasses once their SDK is imported
+    retryable_errors: Tuple[type, ...] = ()
+    
+    def __init__(self):
+        """Initialize the concurrency limit and token budget shared by all requests."""
+        self._sem = asyncio.Semaphore(int(os.getenv("AI_CONCURRENCY", "5")))
+        self._token_budget = TokenBudgetTracker(int(os.getenv("AI_TPM_LIMIT", "0")))
+        self._batch_timeout = float(os.getenv("BATCH_TIMEOUT", str(DEFAULT_BATCH_TIMEOUT)))
+    
+    async def _request_with_retries(self, request: Callable[[], Awaitable[Any]], acquire: bool = True) -> Any:
+        """
+        Run an API request under the concurrency limit, retrying transient failures.
+        
+        Retries use exponential backoff with jitter, honoring the server's
+        retry-after header when one is sent.
+        
+        Args:
+            request: Callable returning the API request awaitable
+            acquire: Whether to take a concurrency slot; False when the caller already holds one
+            
+        Returns:
+            The API response
+        """
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                async with self._sem if acquire else contextlib.nullcontext():
+                    await self._token_budget.wait()
+                    response = await request()
+                self._token_budget.record(_usage_tokens(response))
+                return response
+            except self.retryable_errors as e:
+                status = getattr(e, "status_code", None)
+                if status is not None and status not in RETRYABLE_STATUS_CODES and status < 500:
+                    raise
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                delay = _retry_after_seconds(e)
+                if delay is not None and delay > RETRY_AFTER_MAX:
+                    logger.warning(f"Clamping retry-after of {delay:.1f}s to {RETRY_AFTER_MAX:.0f}s")
+                    delay = RETRY_AFTER_MAX
+                if delay is None:
+                    delay = min(BACKOFF_MAX, BACKOFF_INITIAL * 2 ** (attempt - 1)) + random.uniform(0, 1)
+                logger.warning(f"Transient API error (attempt {attempt}/{MAX_ATTEMPTS}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+    
+    async def _cancel_timed_out_batch(self, batch_id: str, cancel: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Cancel a batch that exceeded the batch timeout and raise.
+        
+        Args:
+            batch_id: Provider batch ID
+            cancel: Callable returning the cancel request awaitable
+            
+        Raises:
+            TimeoutError: Always, so callers fall back to basic summaries
+        """
+        try:
+            await self._request_with_retries(cancel)
+        except Exception as e:
+            logger.warning(f"Failed to cancel batch {batch_id}: {e}")
+        raise TimeoutError(f"Batch {batch_id} did not finish within {self._batch_timeout:.0f}s and was cancelled")
+    
+    async def _stream_with_retries(self, request: Callable[[], Awaitable[Any]]) -> AsyncIterator[Any]:
+        """
+        Open a streaming API request and yield its events.
+        
+        The concurrency slot is held until the stream is exhausted, since the
+        generation runs after the response headers arrive. Callers record the
+        token usage reported in the final events.
+        
+        Args:
+            request: Callable returning the streaming API request awaitable
+            
+        Returns:
+            Async iterator over stream events
+        """
+        async with self._sem:
+            stream = await self._request_with_retries(request, acquire=False)
+            async with stream:
+                async for event in stream:
+                    yield event
+    
     @abstractmethod
-    def generate_summary(self, system_prompt: str, user_prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> str:
+    async def generate_summary(self, system_prompt: str, user_prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> str:
         """
         Generate a summary using the AI provider.
         
@@ -33,7 +191,43 @@ class AIProvider(ABC):
         pass
     
     @abstractmethod
-    def test_connection(self) -> bool:
+    def stream_summary(self, system_prompt: str, user_prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> AsyncIterator[str]:
+        """
+        Generate a summary, yielding text deltas as the provider streams them.
+        
+        Args:
+            system_prompt: The system prompt defining the AI's role
+            user_prompt: The user prompt with the actual content to analyze
+            max_tokens: Maximum tokens for the response
+            temperature: Temperature for response generation
+            
+        Returns:
+            Async iterator over generated text fragments
+        """
+        pass
+    
+    @abstractmethod
+    async def generate_summaries_batch(self, requests: List[Tuple[str, str, str]], max_tokens: int = 500, temperature: float = 0.3) -> Dict[str, str]:
+        """
+        Generate several summaries through the provider's batch API.
+        
+        Args:
+            requests: List of (custom_id, system_prompt, user_prompt)
+            max_tokens: Maximum tokens for each response
+            temperature: Temperature for response generation
+            
+        Returns:
+            Dictionary mapping custom_id to generated summary text; failed
+            requests are omitted
+        """
+        pass
+    
+    async def aclose(self) -> None:
+        """Close the underlying API client and its connection pool."""
+        await self.client.close()
+    
+    @abstractmethod
+    async def test_connection(self) -> bool:
         """
         Test the connection to the AI provider.
         
@@ -45,26 +239,30 @@ class AIProvider(ABC):
 class OpenAIProvider(AIProvider):
     """OpenAI API provider implementation."""
     
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
+    def __init__(self, api_key: str, model: str = DEFAULT_MODELS['openai'], http_client: Optional[Any] = None):
         """
         Initialize OpenAI provider.
         
         Args:
             api_key: OpenAI API key
             model: Model to use for generation
+            http_client: Optional shared httpx.AsyncClient for connection reuse
         """
+        super().__init__()
         try:
-            from openai import OpenAI
-            self.client = OpenAI(api_key=api_key)
+            from openai import AsyncOpenAI, APIConnectionError, APIStatusError
+            # Retries are handled by _request_with_retries
+            self.client = AsyncOpenAI(api_key=api_key, max_retries=0, http_client=http_client)
+            self.retryable_errors = (APIStatusError, APIConnectionError)
             self.model = model
             logger.info(f"Initialized OpenAI provider with model: {model}")
         except ImportError:
             raise ImportError("OpenAI library not installed. Run: pip install openai")
     
-    def generate_summary(self, system_prompt: str, user_prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> str:
+    async def generate_summary(self, system_prompt: str, user_prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> str:
         """Generate summary using OpenAI."""
         try:
-            response = self.client.chat.completions.create(
+            response = await self._request_with_retries(lambda: self.client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -72,7 +270,7 @@ class OpenAIProvider(AIProvider):
                 ],
                 max_tokens=max_tokens,
                 temperature=temperature
-            )
+            ))
             
             summary = response.choices[0].message.content
             if summary:
@@ -87,10 +285,101 @@ class OpenAIProvider(AIProvider):
             logger.error(f"OpenAI API error: {e}")
             raise
     
-    def test_connection(self) -> bool:
+    async def stream_summary(self, system_prompt: str, user_prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> AsyncIterator[str]:
+        """Stream summary using OpenAI."""
+        try:
+            tokens = 0
+            async for chunk in self._stream_with_retries(lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+                # Usage arrives in a final chunk with no choices
+                stream_options={"include_usage": True}
+            )):
+                if chunk.usage is not None:
+                    tokens = _usage_tokens(chunk)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            self._token_budget.record(tokens)
+            logger.info("Streamed summary using OpenAI")
+                
+        except Exception as e:
+            logger.error(f"OpenAI API error: {e}")
+            raise
+    
+    async def generate_summaries_batch(self, requests: List[Tuple[str, str, str]], max_tokens: int = 500, temperature: float = 0.3) -> Dict[str, str]:
+        """Generate summaries using the OpenAI Batch API."""
+        try:
+            lines = [
+                json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.model,
+                        "messages": [
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": user_prompt}
+                        ],
+                        "max_tokens": max_tokens,
+                        "temperature": temperature
+                    }
+                })
+                for custom_id, system_prompt, user_prompt in requests
+            ]
+            input_file = await self._request_with_retries(lambda: self.client.files.create(
+                file=("release_notes_batch.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            ))
+            batch = await self._request_with_retries(lambda: self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            ))
+            batch_id = batch.id
+            logger.info(f"Submitted OpenAI batch {batch_id} with {len(requests)} requests")
+            
+            deadline = time.monotonic() + self._batch_timeout
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                if time.monotonic() >= deadline:
+                    await self._cancel_timed_out_batch(batch_id, lambda: self.client.batches.cancel(batch_id))
+                await asyncio.sleep(BATCH_POLL_INTERVAL)
+                batch = await self._request_with_retries(lambda: self.client.batches.retrieve(batch_id))
+            
+            if batch.status != "completed" or not batch.output_file_id:
+                raise RuntimeError(f"OpenAI batch {batch_id} finished with status {batch.status}")
+            
+            content = await self._request_with_retries(lambda: self.client.files.content(batch.output_file_id))
+            summaries = {}
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                response = result.get("response") or {}
+                if response.get("status_code") != 200:
+                    logger.warning(f"OpenAI batch request {result.get('custom_id')} failed: {result.get('error')}")
+                    continue
+                summary = response["body"]["choices"][0]["message"]["content"]
+                if summary:
+                    summaries[result["custom_id"]] = summary.strip()
+            
+            logger.info(f"Generated {len(summaries)} summaries using OpenAI batch {batch_id}")
+            return summaries
+            
+        except Exception as e:
+            logger.error(f"OpenAI batch API error: {e}")
+            raise
+    
+    async def test_connection(self) -> bool:
         """Test OpenAI connection."""
         try:
-            self.client.models.list()
+            # Retrieving the configured model is a single cheap request that also validates it
+            await self.client.models.retrieve(self.model)
             logger.info("OpenAI connection successful")
             return True
         except Exception as e:
@@ -100,45 +389,50 @@ class OpenAIProvider(AIProvider):
 class ClaudeProvider(AIProvider):
     """Claude API provider implementation."""
     
-    def __init__(self, api_key: str, model: str = "claude-3-haiku-20240307"):
+    def __init__(self, api_key: str, model: str = DEFAULT_MODELS['claude'], http_client: Optional[Any] = None):
         """
         Initialize Claude provider.
         
         Args:
             api_key: Anthropic API key
             model: Model to use for generation
+            http_client: Optional shared httpx.AsyncClient for connection reuse
         """
+        super().__init__()
         try:
-            from anthropic import Anthropic
-            self.client = Anthropic(api_key=api_key)
+            from anthropic import AsyncAnthropic, APIConnectionError, APIStatusError
+            # Retries are handled by _request_with_retries
+            self.client = AsyncAnthropic(api_key=api_key, max_retries=0, http_client=http_client)
+            self.retryable_errors = (APIStatusError, APIConnectionError)
             self.model = model
             logger.info(f"Initialized Claude provider with model: {model}")
         except ImportError:
             raise ImportError("Anthropic library not installed. Run: pip install anthropic")
     
-    def generate_summary(self, system_prompt: str, user_prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> str:
+    async def generate_summary(self, system_prompt: str, user_prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> str:
         """Generate summary using Claude."""
         try:
-            # Claude doesn't support system messages, so combine them
-            combined_prompt = f"{system_prompt}\n\n{user_prompt}"
-            response = self.client.messages.create(
+            # Send the system prompt separately and mark it cacheable, so repeated
+            # calls within the cache TTL bill it at the cached-input rate
+            response = await self._request_with_retries(lambda: self.client.messages.create(
                 model=self.model,
                 max_tokens=max_tokens,
                 temperature=temperature,
+                system=[
+                    {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+                ],
                 messages=[
-                    {"role": "user", "content": combined_prompt}
+                    {"role": "user", "content": user_prompt}
                 ]
-            )
-            
-            # Extract text from response content
-            summary = ""
-            for block in response.content:
-                try:
-                    if hasattr(block, 'text'):
-                        summary += str(getattr(block, 'text', ''))
-                except AttributeError:
-                    continue
-                
+            ))
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                logger.info(
+                    f"Claude prompt cache: {getattr(usage, 'cache_read_input_tokens', 0) or 0} tokens read, "
+                    f"{getattr(usage, 'cache_creation_input_tokens', 0) or 0} tokens written"
+                )
+            
+            summary = self._extract_text(response)
             if summary:
                 summary = summary.strip()
                 logger.info("Generated summary using Claude")
@@ -151,18 +445,108 @@ class ClaudeProvider(AIProvider):
             logger.error(f"Claude API error: {e}")
             raise
     
-    def test_connection(self) -> bool:
+    async def stream_summary(self, system_prompt: str, user_prompt: str, max_tokens: int = 500, temperature: float = 0.3) -> AsyncIterator[str]:
+        """Stream summary using Claude."""
+        try:
+            input_tokens = output_tokens = 0
+            async for event in self._stream_with_retries(lambda: self.client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system=[
+                    {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+                ],
+                messages=[
+                    {"role": "user", "content": user_prompt}
+                ],
+                stream=True
+            )):
+                # message_start carries the input usage; message_delta the cumulative output usage
+                if event.type == "message_start":
+                    input_tokens = event.message.usage.input_tokens or 0
+                    output_tokens = event.message.usage.output_tokens or 0
+                elif event.type == "message_delta":
+                    output_tokens = event.usage.output_tokens or 0
+                elif event.type == "content_block_delta" and getattr(event.delta, "type", None) == "text_delta":
+                    yield event.delta.text
+            self._token_budget.record(input_tokens + output_tokens)
+            logger.info("Streamed summary using Claude")
+                
+        except Exception as e:
+            logger.error(f"Claude API error: {e}")
+            raise
+    
+    async def generate_summaries_batch(self, requests: List[Tuple[str, str, str]], max_tokens: int = 500, temperature: float = 0.3) -> Dict[str, str]:
+        """Generate summaries using the Claude Message Batches API."""
+        try:
+            batch = await self._request_with_retries(lambda: self.client.messages.batches.create(requests=[
+                {
+                    "custom_id": custom_id,
+                    "params": {
+                        "model": self.model,
+                        "max_tokens": max_tokens,
+                        "temperature": temperature,
+                        "system": [
+                            {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+                        ],
+                        "messages": [
+                            {"role": "user", "content": user_prompt}
+                        ]
+                    }
+                }
+                for custom_id, system_prompt, user_prompt in requests
+            ]))
+            batch_id = batch.id
+            logger.info(f"Submitted Claude batch {batch_id} with {len(requests)} requests")
+            
+            deadline = time.monotonic() + self._batch_timeout
+            while batch.processing_status != "ended":
+                if time.monotonic() >= deadline:
+                    await self._cancel_timed_out_batch(batch_id, lambda: self.client.messages.batches.cancel(batch_id))
+                await asyncio.sleep(BATCH_POLL_INTERVAL)
+                batch = await self._request_with_retries(lambda: self.client.messages.batches.retrieve(batch_id))
+            
+            summaries = {}
+            async for entry in await self.client.messages.batches.results(batch_id):
+                if entry.result.type != "succeeded":
+                    logger.warning(f"Claude batch request {entry.custom_id} did not succeed: {entry.result.type}")
+                    continue
+                summary = self._extract_text(entry.result.message)
+                if summary:
+                    summaries[entry.custom_id] = summary.strip()
+            
+            logger.info(f"Generated {len(summaries)} summaries using Claude batch {batch_id}")
+            return summaries
+            
+        except Exception as e:
+            logger.error(f"Claude batch API error: {e}")
+            raise
+    
+    @staticmethod
+    def _extract_text(message: Any) -> str:
+        """Extract text from Claude message content blocks."""
+        summary = ""
+        for block in message.content:
+            try:
+                if hasattr(block, 'text'):
+                    summary += str(getattr(block, 'text', ''))
+            except AttributeError:
+                continue
+        return summary
+    
+    async def test_connection(self) -> bool:
         """Test Claude connection."""
         try:
-            # Test by listing models
-            self.client.models.list()
+            # Retrieving the configured model is a single cheap request that also validates it
+            await self.client.models.retrieve(self.model)
             logger.info("Claude connection successful")
             return True
         except Exception as e:
             logger.error(f"Claude connection failed: {e}")
             return False
 
-def create_ai_provider(provider: str, api_key: str, model: Optional[str] = None) -> AIProvider:
+def create_ai_provider(provider: str, api_key: str, model: Optional[str] = None,
+                       http_client: Optional[Any] = None) -> AIProvider:
     """
     Factory function to create an AI provider.
     
@@ -170,15 +554,26 @@ def create_ai_provider(provider: str, api_key: str, model: Optional[str] = None)
         provider: Provider name ('openai' or 'claude')
         api_key: API key for the provider
         model: Optional model name to override default
+        http_client: Optional shared httpx.AsyncClient for connection reuse
         
     Returns:
         AIProvider instance
     """
     if provider.lower() == 'openai':
-        model = model or "gpt-4o-mini"
-        return OpenAIProvider(api_key, model)
+        model = model or DEFAULT_MODELS['openai']
+        return OpenAIProvider(api_key, model, http_client)
     elif provider.lower() == 'claude':
-        model = model or "claude-3-haiku-20240307"
-        return ClaudeProvider(api_key, model)
+        model = model or DEFAULT_MODELS['claude']
+        return ClaudeProvider(api_key, model, http_client)
     else:
-        raise ValueError(f"Unsupported AI provider: {provider}. Supported providers: openai, claude") 
\ No newline at end of file
+        raise ValueError(f"Unsupported AI provider: {provider}. Supported providers: openai, claude")
+
+def _usage_tokens(response: Any) -> int:
+    """Total tokens billed for a response, across OpenAI and Anthropic usage shapes."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0
+    total = getattr(usage, "total_tokens", None)
+    if total is not None:
+        return total
+    return (getattr(usage, "input_tokens", 0) or 0) + (getattr(usage, "output_tokens", 0) or 0) 
\ No newline at end of file
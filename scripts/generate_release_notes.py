@@ -13,33 +13,49 @@ Usage:
 """
 
 import argparse
+import asyncio
+import hashlib
+import json
 import os
 import sys
 import re
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 import logging
 
 # Third-party imports
 try:
+    import aiohttp
+    import httpx
     from github import Github
-    from slack_sdk import WebClient
+    from slack_sdk.web.async_client import AsyncWebClient
     from slack_sdk.errors import SlackApiError
 except ImportError as e:
     print(f"Missing required dependency: {e}")
-    print("Please install with: pip install PyGithub slack_sdk")
+    print("Please install with: pip install PyGithub slack_sdk aiohttp httpx")
     sys.exit(1)
 
+# Optional faster JSON parser, falling back to the standard library
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 # Local imports
 try:
-    from ai_provider import create_ai_provider
+    from ai_provider import DEFAULT_MODELS, AIProvider, create_ai_provider
+    from summary_cache import SummaryCache
 except ImportError:
     # Fallback for when running as module
     import sys
     import os
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from ai_provider import create_ai_provider
+    from ai_provider import DEFAULT_MODELS, AIProvider, create_ai_provider
+    from summary_cache import SummaryCache
 
 # Configure logging
 logging.basicConfig(
@@ -48,7 +64,219 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Maximum number of repositories processed concurrently
+REPO_CONCURRENCY = 5
+
+# Output token budget per repository summary
+SUMMARY_MAX_TOKENS = 500
+
+# Limits for grouping repositories into one consolidated AI request: PR text size keeps
+# the prompt well inside the context window, and the repository count keeps the
+# response within the output limit of the smallest default model (4096 tokens)
+CONSOLIDATED_MAX_CHARS = 60000
+CONSOLIDATED_MAX_REPOS = 8
+
+# File the generated message is written to for the action output
+MESSAGE_FILE = "generated_message.txt"
+
+# Minimum seconds between Slack edits of the progress message in streaming mode,
+# keeping chat.update under Slack's Tier 3 rate limit (about 50 calls per minute)
+STREAM_UPDATE_INTERVAL = 2.0
+
+# Size of the keep-alive connection pools shared by the HTTP clients
+HTTP_POOL_SIZE = 20
+
+# Title prefix of dependency update PRs, matched case-insensitively
+DEPS_PR_PREFIX = "chore(deps)"
+
+# Precompiled patterns for AI response cleanup
+_JSON_FENCE_RE = re.compile(r'^(?:```(?:json)?|json)\s*|\s*```$')
+
+# Maximum characters of a PR description sent to the AI
+PR_BODY_MAX_CHARS = 800
+
+# PR template sections that carry no release notes content, dropped with their contents
+BOILERPLATE_SECTIONS = ("checklist", "screenshots", "screenshot", "test plan", "testing", "how to test")
+
+# Precompiled patterns for PR description pruning
+_HTML_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+_IMAGE_RE = re.compile(r'!\[[^\]]*\]\([^)]*\)|<img\b[^>]*>', re.IGNORECASE)
+_HEADING_RE = re.compile(r'^\s{0,3}#{1,6}\s+(.*?)\s*#*\s*$')
+_FENCE_RE = re.compile(r'^\s{0,3}(`{3,}|~{3,})')
+_CHECKLIST_ITEM_RE = re.compile(r'^\s*[-*]\s*\[[ xX]\]')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n+')
+
+# Translation table producing the plain-text fallback of Slack messages
+_SLACK_TEXT_TABLE = str.maketrans({'*': None, '•': '-', '◦': '  -'})
+
+# System prompt for release notes generation. Kept as a module constant so the text is
+# byte-identical across calls, which provider-side prompt caching requires.
+RELEASE_NOTES_SYSTEM_PROMPT = """
+You are an expert technical writer creating user-facing release notes. Your task is to transform pull request data into clear, benefit-focused release notes.
+
+CRITICAL RULES:
+1. NEVER list individual PR numbers or titles
+2. Use each repository name exactly as given, only as a top-level JSON key; NEVER mention repository names inside items
+3. SYNTHESIZE all changes into coherent features and improvements
+4. Focus on WHY changes matter to users/developers, but include relevant technical context
+5. Group related technical changes together
+6. Summarize each repository separately and include every repository from the input
+
+INPUT: You'll receive a JSON object mapping each repository name to its PR titles, descriptions, and labels.
+
+OUTPUT FORMAT (JSON):
+```json
+{
+  "org/repository-name": {
+    "categories": [
+      {
+        "name": "Feature Category",
+        "items": [
+          "Specific improvement with clear benefit and technical context",
+          "Another improvement with impact described"
+        ]
+      },
+      {
+        "name": "Bug Fixes", 
+        "items": [
+          "Fixed [issue] that [what it was causing for users/developers]"
+        ]
+      },
+      {
+        "name": "Technical Improvements",
+        "items": [
+          "[Technical enhancement] that [benefit/impact]"
+        ]
+      }
+    ]
+  }
+}
+```
+
+IMPORTANT: Return ONLY valid JSON, no other text or formatting.
+
+TRANSFORMATION EXAMPLES:
+- "chore/add_user_settings_field" → "Added new user settings field for improved customization options"
+- "fix-dashboard-loading-performance" → "Optimized dashboard queries for improved loading performance"
+- "upgrade-ai-model" → "Upgraded AI model for improved response accuracy and context understanding"
+- "enhance-api-integration" → "Enhanced API integration with webhook support and improved error handling"
+- "db-optimization" → "Database query optimization for improved API response times"
+- "auth-refactor" → "Refactored authentication system to support OAuth2 and improve security"
+
+GUIDELINES:
+- Extract the actual feature from vague PR titles
+- Combine related PRs into single, comprehensive bullet points
+- Include relevant technical details that developers would care about
+- Prioritize changes by impact (user-facing first, then technical improvements)
+- Use active voice and specific benefits
+- For technical improvements, explain both the technical change and its benefit
+- Skip truly internal-only changes with no impact
+- NEVER include specific performance claims (like "5x faster", "40% improvement") unless explicitly proven in the PR
+- Use general terms like "improved performance", "optimized", "enhanced" instead of specific metrics
+- Focus on what was changed rather than unproven performance claims
+
+Analyze each repository's PRs holistically and create a cohesive narrative of improvements, balancing user benefits with technical context.
+"""
+
+# User prompt wrapping the JSON payload of pull requests keyed by repository name
+USER_PROMPT_TEMPLATE = """Pull Requests to analyze, as a JSON object keyed by repository name:
+{prs}
+
+Create user-facing release notes for each repository following the format and guidelines above."""
+
+# Cached summaries are formatted Slack text; bump when _format_categories output changes
+SUMMARY_FORMAT_VERSION = 1
+_SYSTEM_PROMPT_DIGEST = hashlib.sha256(RELEASE_NOTES_SYSTEM_PROMPT.encode("utf-8")).hexdigest()
+
+# GraphQL query returning merged PRs with all fields needed for summarization in one
+# request per page (100 PRs, the API maximum). The repository lookup makes unknown
+# repositories fail loudly.
+MERGED_PRS_QUERY = """
+query($owner: String!, $name: String!, $searchQuery: String!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    id
+  }
+  search(query: $searchQuery, type: ISSUE, first: 100, after: $after) {
+    issueCount
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+    nodes {
+      ... on PullRequest {
+        number
+        title
+        body
+        url
+        mergedAt
+        labels(first: 20) {
+          nodes {
+            name
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# GitHub search returns at most this many results per query
+SEARCH_RESULT_LIMIT = 1000
+
+def _prune_body(body: str, max_chars: int = PR_BODY_MAX_CHARS) -> str:
+    """
+    Strip template boilerplate from a PR description to cut AI input tokens.
+    
+    Removes HTML comments, images, checklist items and boilerplate template
+    sections, collapses blank lines, and truncates at a sentence boundary.
+    
+    Args:
+        body: Raw PR description
+        max_chars: Maximum length of the pruned description
+        
+    Returns:
+        Pruned PR description
+    """
+    body = _IMAGE_RE.sub('', _HTML_COMMENT_RE.sub('', body))
+    
+    lines = []
+    skipping = False
+    fence = None
+    for line in body.splitlines():
+        # Headings and checklists inside code fences are content, not structure
+        fence_match = _FENCE_RE.match(line)
+        if fence_match:
+            marker = fence_match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker[0] == fence[0] and len(marker) >= len(fence):
+                fence = None
+        elif fence is not None:
+            if not skipping:
+                lines.append(line.rstrip())
+            continue
+        
+        heading = _HEADING_RE.match(line)
+        if heading:
+            skipping = heading.group(1).lower().rstrip(':') in BOILERPLATE_SECTIONS
+            if skipping:
+                continue
+        if skipping or _CHECKLIST_ITEM_RE.match(line):
+            continue
+        lines.append(line.rstrip())
+    
+    body = _BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip()
+    if len(body) <= max_chars:
+        return body
+    
+    # Cut at the last sentence or line break that keeps at least half the budget
+    truncated = body[:max_chars]
+    boundary = max(truncated.rfind('. '), truncated.rfind('\n'))
+    if boundary >= max_chars // 2:
+        truncated = truncated[:boundary + 1]
+    return truncated.rstrip() + "…"
+
+@dataclass(slots=True, frozen=True)
 class PullRequest:
     """Data class for pull request information."""
     title: str
@@ -59,15 +287,97 @@ class PullRequest:
     labels: List[str]
     repo_name: str
 
+class SlackProgressMessage:
+    """Slack message edited in place while release notes are being generated."""
+    
+    def __init__(self, slack_client: AsyncWebClient, channel: str, header_text: str, repos: List[str]):
+        """
+        Initialize the progress message.
+        
+        Args:
+            slack_client: Slack client used to post and edit the message
+            channel: Slack channel to post to
+            header_text: Header shown above the progress lines
+            repos: Repositories being processed
+        """
+        self.slack_client = slack_client
+        self.channel = channel
+        self.header_text = header_text
+        self.status = {repo: "queued" for repo in repos}
+        self.channel_id: Optional[str] = None
+        self.ts: Optional[str] = None
+        self._last_update = 0.0
+        self._updating = False
+    
+    def _text(self, headline: str = "_Generating release notes..._") -> str:
+        lines = [f"*{self.header_text}*", headline, ""]
+        lines.extend(f"• {repo}: {status}" for repo, status in self.status.items())
+        return "\n".join(lines)
+    
+    async def post(self) -> None:
+        """Post the initial progress message."""
+        response = await self.slack_client.chat_postMessage(
+            channel=self.channel,
+            text=self._text(),
+            unfurl_links=False
+        )
+        # Edits must address the channel by ID rather than by name
+        self.channel_id = response["channel"]
+        self.ts = response["ts"]
+        logger.info(f"Progress message posted to Slack channel {self.channel}: {self.ts}")
+    
+    async def update(self, repos: List[str], status: str) -> None:
+        """
+        Record the status of repositories and edit the message, at most once per interval.
+        
+        Args:
+            repos: Repository names
+            status: Status text to show for the repositories
+        """
+        for repo in repos:
+            self.status[repo] = status
+        now = time.monotonic()
+        if self.ts is None or self._updating or now - self._last_update < STREAM_UPDATE_INTERVAL:
+            return
+        
+        self._updating = True
+        self._last_update = now
+        try:
+            await self.slack_client.chat_update(
+                channel=self.channel_id,
+                ts=self.ts,
+                text=self._text()
+            )
+        except SlackApiError as e:
+            logger.warning(f"Failed to update Slack progress message: {e.response['error']}")
+        finally:
+            self._updating = False
+    
+    async def fail(self) -> None:
+        """Mark the message as failed so it does not keep showing generation in progress."""
+        if self.ts is None:
+            return
+        try:
+            await self.slack_client.chat_update(
+                channel=self.channel_id,
+                ts=self.ts,
+                text=self._text("_Release notes generation failed, see the workflow logs for details._")
+            )
+        except SlackApiError as e:
+            logger.warning(f"Failed to update Slack progress message: {e.response['error']}")
+
 class ReleaseNotesGenerator:
     """Main class for generating release notes."""
     
     def __init__(self, slack_bot_token: str, slack_channel: str, 
                  ai_provider: str, ai_api_key: str, github_token: str, 
-                 ai_model: Optional[str] = None):
+                 ai_model: Optional[str] = None, use_batch: bool = False,
+                 stream: bool = False, preflight: bool = False):
         """
         Initialize the generator with required tokens.
         
+        Must be called from a running event loop, which the Slack HTTP session binds to.
+        
         Args:
             slack_bot_token: Slack Bot Token
             slack_channel: Slack channel to post to (e.g., #release-notes)
@@ -75,20 +385,85 @@ class ReleaseNotesGenerator:
             ai_api_key: API key for the AI provider
             github_token: GitHub Personal Access Token
             ai_model: Optional model name to override default
+            use_batch: Summarize through the provider's discounted batch API
+            stream: Stream AI output and show progress in Slack while generating
+            preflight: Test all API connections before generating
         """
-        self.slack_client = WebClient(token=slack_bot_token)
+        # Pooled keep-alive connections avoid a TLS handshake per request
+        self.http_client = httpx.AsyncClient(limits=httpx.Limits(
+            max_connections=HTTP_POOL_SIZE,
+            max_keepalive_connections=HTTP_POOL_SIZE,
+            keepalive_expiry=60
+        ))
+        # Without a session, slack_sdk opens and closes one per API call
+        self.slack_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=HTTP_POOL_SIZE))
+        self.slack_client = AsyncWebClient(token=slack_bot_token, session=self.slack_session)
         self.slack_channel = slack_channel
-        self.ai_provider = create_ai_provider(ai_provider, ai_api_key, ai_model)
-        self.github_client = Github(github_token)
+        # Resolved up front so cache lookups don't have to create the provider
+        self.ai_model = ai_model or DEFAULT_MODELS.get(ai_provider.lower())
+        self._ai_provider_config = (ai_provider, ai_api_key, self.ai_model)
+        self._ai_provider: Optional[AIProvider] = None
+        self._github_token = github_token
+        self._github_clients: List[Github] = []
+        self._github_clients_lock = threading.Lock()
+        self._github_local = threading.local()
+        self.github_client = self._new_github_client()
+        self.summary_cache = SummaryCache(os.getenv("RN_CACHE_DIR", ".rn_cache"))
+        self.use_batch = use_batch
+        self.stream = stream
+        self.preflight = preflight
+        self.progress: Optional[SlackProgressMessage] = None
+    
+    @property
+    def ai_provider(self) -> AIProvider:
+        """AI provider, created on first use so runs that need no AI call skip its setup."""
+        if self._ai_provider is None:
+            self._ai_provider = create_ai_provider(*self._ai_provider_config, self.http_client)
+        return self._ai_provider
+    
+    async def __aenter__(self) -> "ReleaseNotesGenerator":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Close all API clients and their connection pools."""
+        if self._ai_provider is not None:
+            await self._ai_provider.aclose()
+        await self.http_client.aclose()
+        await self.slack_session.close()
+        for github_client in self._github_clients:
+            github_client.close()
+    
+    def _new_github_client(self) -> Github:
+        """Create a GitHub client, tracked so aclose() can close it."""
+        # GraphQL queries are POSTs, which PyGithub throttles as writes (1 s apart by
+        # default); they only read data, so the throttle is disabled
+        github_client = Github(self._github_token, pool_size=HTTP_POOL_SIZE, seconds_between_writes=None)
+        with self._github_clients_lock:
+            self._github_clients.append(github_client)
+        return github_client
+    
+    def _thread_github_client(self) -> Github:
+        """
+        GitHub client owned by the current worker thread.
         
-        # Test API connections
-        self._test_connections()
+        PyGithub hands the same persistent connection to every thread using a
+        client and keeps the in-flight request on it, so concurrent fetches
+        must not share a client.
+        """
+        github_client = getattr(self._github_local, "client", None)
+        if github_client is None:
+            github_client = self._new_github_client()
+            self._github_local.client = github_client
+        return github_client
     
-    def _test_connections(self):
+    async def _test_connections(self):
         """Test that all API connections are working."""
         try:
             # Test GitHub connection
-            user = self.github_client.get_user()
+            user = await asyncio.to_thread(self.github_client.get_user)
             logger.info(f"GitHub connection successful (authenticated as: {user.login})")
         except Exception as e:
             logger.error(f"GitHub connection failed: {e}")
@@ -96,7 +471,7 @@ class ReleaseNotesGenerator:
             
         try:
             # Test Slack connection
-            self.slack_client.auth_test()
+            await self.slack_client.auth_test()
             logger.info("Slack connection successful")
         except Exception as e:
             logger.error(f"Slack connection failed: {e}")
@@ -104,7 +479,7 @@ class ReleaseNotesGenerator:
             
         try:
             # Test AI provider connection
-            if self.ai_provider.test_connection():
+            if await self.ai_provider.test_connection():
                 logger.info("AI provider connection successful")
             else:
                 raise Exception("AI provider connection failed")
@@ -112,10 +487,13 @@ class ReleaseNotesGenerator:
             logger.error(f"AI provider connection failed: {e}")
             raise
     
-    def get_merged_prs(self, repo_name: str, since_date: datetime) -> List[PullRequest]:
+    async def get_merged_prs(self, repo_name: str, since_date: datetime) -> List[PullRequest]:
         """
         Get merged pull requests for a repository since a given date.
         
+        PyGithub is synchronous, so the fetch runs in a worker thread to keep
+        the event loop free for other repositories.
+        
         Args:
             repo_name: Repository name in format 'org/repo'
             since_date: Date to look back from
@@ -123,35 +501,60 @@ class ReleaseNotesGenerator:
         Returns:
             List of PullRequest objects
         """
+        return await asyncio.to_thread(self._fetch_merged_prs, repo_name, since_date)
+    
+    def _fetch_merged_prs(self, repo_name: str, since_date: datetime) -> List[PullRequest]:
+        """Blocking implementation of get_merged_prs."""
         try:
-            repo = self.github_client.get_repo(repo_name)
+            owner, name = repo_name.split("/", 1)
+            github_client = self._thread_github_client()
             logger.info(f"Fetching PRs for {repo_name} since {since_date.isoformat()}")
             
-            # Query for merged PRs
-            query = f"repo:{repo_name} is:pr is:merged merged:>={since_date.strftime('%Y-%m-%d')}"
-            prs = self.github_client.search_issues(query=query, sort='updated', order='desc')
+            # Query for merged PRs, filtering on the exact timestamp rather than the day
+            # so PRs merged earlier on the start date are not fetched
+            since_utc = since_date.astimezone(timezone.utc)
+            query = f"repo:{repo_name} is:pr is:merged merged:>={since_utc.strftime('%Y-%m-%dT%H:%M:%SZ')} sort:updated-desc"
             
             pull_requests = []
-            for pr in prs:
-                # Get full PR details
-                full_pr = repo.get_pull(pr.number)
+            seen = set()
+            cursor = None
+            while True:
+                _, response = github_client.requester.graphql_query(
+                    MERGED_PRS_QUERY,
+                    {"owner": owner, "name": name, "searchQuery": query, "after": cursor}
+                )
+                search = response["data"]["search"]
+                if cursor is None and search["issueCount"] > SEARCH_RESULT_LIMIT:
+                    logger.warning(
+                        f"{repo_name} has {search['issueCount']} matching PRs; GitHub search returns "
+                        f"at most {SEARCH_RESULT_LIMIT}, consider a shorter --days-back"
+                    )
                 
-                # Ensure merged_at is not None
-                merged_at = full_pr.merged_at
-                if merged_at is None:
-                    logger.warning(f"PR #{full_pr.number} has no merged_at date, skipping")
-                    continue
+                for node in search["nodes"]:
+                    # Ensure merged_at is not None
+                    if not node or not node.get("mergedAt"):
+                        logger.warning(f"PR #{(node or {}).get('number')} has no merged_at date, skipping")
+                        continue
+                    
+                    merged_at = datetime.fromisoformat(node["mergedAt"].replace("Z", "+00:00"))
+                    if merged_at < since_date or node["number"] in seen:
+                        continue
+                    seen.add(node["number"])
+                    
+                    pull_request = PullRequest(
+                        title=node["title"],
+                        body=node["body"] or "",
+                        number=node["number"],
+                        url=node["url"],
+                        merged_at=merged_at,
+                        labels=[label["name"] for label in node["labels"]["nodes"]],
+                        repo_name=repo_name
+                    )
+                    pull_requests.append(pull_request)
                 
-                pull_request = PullRequest(
-                    title=full_pr.title,
-                    body=full_pr.body or "",
-                    number=full_pr.number,
-                    url=full_pr.html_url,
-                    merged_at=merged_at,
-                    labels=[label.name for label in full_pr.labels],
-                    repo_name=repo_name
-                )
-                pull_requests.append(pull_request)
+                if not search["pageInfo"]["hasNextPage"]:
+                    break
+                cursor = search["pageInfo"]["endCursor"]
                 
             logger.info(f"Found {len(pull_requests)} merged PRs in {repo_name}")
             return pull_requests
@@ -173,11 +576,8 @@ class ReleaseNotesGenerator:
         regular_prs = []
         deps_prs = []
         
-        # Regex pattern for dependency update PRs
-        deps_pattern = re.compile(r'^chore\(deps\)', re.IGNORECASE)
-        
         for pr in prs:
-            if deps_pattern.match(pr.title):
+            if pr.title[:len(DEPS_PR_PREFIX)].lower().startswith(DEPS_PR_PREFIX):
                 deps_prs.append(pr)
             else:
                 regular_prs.append(pr)
@@ -204,175 +604,275 @@ class ReleaseNotesGenerator:
         
         formatted_prs = []
         for pr in prs:
-            # Clean up the title and body
-            title = pr.title.strip()
-            body = pr.body.strip() if pr.body else ""
-            
-            # Include labels if available
-            labels_text = f"Labels: {', '.join(pr.labels)}" if pr.labels else ""
-            
-            # Format the PR information
-            pr_info = f"PR #{pr.number}: {title}"
-            if body:
-                pr_info += f"\nDescription: {body}"
-            if labels_text:
-                pr_info += f"\n{labels_text}"
-            if pr.url:
-                pr_info += f"\nURL: {pr.url}"
-            
-            formatted_prs.append(pr_info)
+            # Build optional lines, then emit each PR with a single f-string
+            body = _prune_body(pr.body) if pr.body else ""
+            description = f"\nDescription: {body}" if body else ""
+            labels = f"\nLabels: {', '.join(pr.labels)}" if pr.labels else ""
+            url = f"\nURL: {pr.url}" if pr.url else ""
+            formatted_prs.append(f"PR #{pr.number}: {pr.title.strip()}{description}{labels}{url}")
         
         return "\n\n".join(formatted_prs)
     
-    def summarize_with_ai(self, repo_name: str, prs_text: str) -> str:
+    def _build_user_prompt(self, chunk: List[Tuple[str, List[PullRequest], str]]) -> str:
+        """Build the user prompt asking the AI to summarize several repositories' PRs."""
+        payload = json.dumps({repo_name: prs_text for repo_name, _, prs_text in chunk}, ensure_ascii=False)
+        return USER_PROMPT_TEMPLATE.format(prs=payload)
+    
+    def _chunk_repo_prs(self, repo_prs: List[Tuple[str, List[PullRequest]]]) -> List[List[Tuple[str, List[PullRequest], str]]]:
         """
-        Use AI to summarize pull requests for a repository.
+        Group repositories into consolidated AI requests.
+        
+        Each chunk stays under CONSOLIDATED_MAX_CHARS of PR text and
+        CONSOLIDATED_MAX_REPOS repositories, so prompts fit the context window
+        and responses fit the output token limit.
         
         Args:
-            repo_name: Repository name
-            prs_text: Formatted pull requests text
+            repo_prs: List of (repository name, pull requests)
             
         Returns:
-            AI-generated summary
+            List of chunks of (repository name, pull requests, formatted PR text)
         """
-        if not prs_text or prs_text == "No pull requests found.":
-            return f"*{repo_name}*: No changes in the specified time period."
+        chunks: List[List[Tuple[str, List[PullRequest], str]]] = []
+        size = 0
+        for repo_name, prs in repo_prs:
+            prs_text = self.format_prs_for_summary(prs)
+            if not chunks or len(chunks[-1]) >= CONSOLIDATED_MAX_REPOS or size + len(prs_text) > CONSOLIDATED_MAX_CHARS:
+                chunks.append([])
+                size = 0
+            chunks[-1].append((repo_name, prs, prs_text))
+            size += len(prs_text)
+        return chunks
+    
+    def _fallback_summary(self, prs: List[PullRequest]) -> str:
+        """Basic summary used when the AI provider fails."""
+        return f"{len(prs)} pull requests merged. See individual PRs for details."
+    
+    def _cache_key(self, repo_name: str, prs: List[PullRequest]) -> str:
+        """Cache key identifying a repository's set of pull requests and how they are summarized."""
+        return SummaryCache.make_key(
+            SUMMARY_FORMAT_VERSION,
+            _SYSTEM_PROMPT_DIGEST,
+            repo_name,
+            self.ai_model,
+            sorted((pr.number, pr.title, pr.merged_at.isoformat()) for pr in prs)
+        )
+    
+    def _format_categories(self, data: Dict[str, Any]) -> str:
+        """Format one repository's categories from the AI response for Slack."""
+        formatted_categories = []
+        for category in data.get('categories', []):
+            category_name = category.get('name', '')
+            items = category.get('items', [])
+            
+            if items:
+                formatted_items = "\n".join(f"  ◦ {item}" for item in items)
+                formatted_categories.append(f"• *{category_name}*:\n{formatted_items}")
         
-        try:
-            release_notes_prompt = """
-You are an expert technical writer creating user-facing release notes. Your task is to transform pull request data into clear, benefit-focused release notes.
-
-CRITICAL RULES:
-1. NEVER list individual PR numbers or titles
-2. NEVER include repository names in the output (they will be added automatically)
-3. SYNTHESIZE all changes into coherent features and improvements
-4. Focus on WHY changes matter to users/developers, but include relevant technical context
-5. Group related technical changes together
-
-INPUT: You'll receive PR titles, descriptions, and commit messages for multiple repositories.
-
-OUTPUT FORMAT (JSON):
-```json
-{
-  "categories": [
-    {
-      "name": "Feature Category",
-      "items": [
-        "Specific improvement with clear benefit and technical context",
-        "Another improvement with impact described"
-      ]
-    },
-    {
-      "name": "Bug Fixes", 
-      "items": [
-        "Fixed [issue] that [what it was causing for users/developers]"
-      ]
-    },
-    {
-      "name": "Technical Improvements",
-      "items": [
-        "[Technical enhancement] that [benefit/impact]"
-      ]
-    }
-  ]
-}
-```
-
-IMPORTANT: Return ONLY valid JSON, no other text or formatting.
-
-TRANSFORMATION EXAMPLES:
-- "chore/add_user_settings_field" → "Added new user settings field for improved customization options"
-- "fix-dashboard-loading-performance" → "Optimized dashboard queries for improved loading performance"
-- "upgrade-ai-model" → "Upgraded AI model for improved response accuracy and context understanding"
-- "enhance-api-integration" → "Enhanced API integration with webhook support and improved error handling"
-- "db-optimization" → "Database query optimization for improved API response times"
-- "auth-refactor" → "Refactored authentication system to support OAuth2 and improve security"
-
-GUIDELINES:
-- Extract the actual feature from vague PR titles
-- Combine related PRs into single, comprehensive bullet points
-- Include relevant technical details that developers would care about
-- Prioritize changes by impact (user-facing first, then technical improvements)
-- Use active voice and specific benefits
-- For technical improvements, explain both the technical change and its benefit
-- Skip truly internal-only changes with no impact
-- NEVER include specific performance claims (like "5x faster", "40% improvement") unless explicitly proven in the PR
-- Use general terms like "improved performance", "optimized", "enhanced" instead of specific metrics
-- Focus on what was changed rather than unproven performance claims
-
-Analyze all PRs holistically and create a cohesive narrative of improvements, balancing user benefits with technical context.
-"""
-
-            system_prompt = release_notes_prompt
+        return "\n\n".join(formatted_categories)
+    
+    def _format_summaries(self, chunk: List[Tuple[str, List[PullRequest], str]], summary_json: str) -> Dict[str, str]:
+        """
+        Parse the AI's JSON response for a chunk and format each repository for Slack.
+        
+        Successfully parsed summaries are stored in the summary cache.
+        
+        Args:
+            chunk: Repositories the response was generated for
+            summary_json: Raw AI response
             
-            user_prompt = f"""Repository: {repo_name}
-
-Pull Requests to analyze:
-{prs_text}
-
-Create user-facing release notes following the format and guidelines above."""
+        Returns:
+            Dictionary mapping repository name to formatted summary
+        """
+        try:
+            # Clean up the response - remove "json" prefix and code block markers,
+            # using the regex only when the common forms leave a marker behind
+            cleaned_json = summary_json.strip().removeprefix("```json").removeprefix("json").removesuffix("```").strip()
+            if "```" in cleaned_json:
+                cleaned_json = _JSON_FENCE_RE.sub('', cleaned_json).strip()
             
-            summary_json = self.ai_provider.generate_summary(system_prompt, user_prompt)
+            data = _json_loads(cleaned_json)
             
-            # Parse JSON and format for Slack
+        except json.JSONDecodeError as e:
+            repo_names = ", ".join(repo_name for repo_name, _, _ in chunk)
+            logger.warning(f"Failed to parse JSON for {repo_names}, falling back: {e}")
+            # Fallback to raw text if JSON parsing fails and the text belongs to a single repo
+            if len(chunk) == 1:
+                repo_name = chunk[0][0]
+                return {repo_name: summary_json}
+            return {repo_name: self._fallback_summary(prs) for repo_name, prs, _ in chunk}
+        
+        summaries = {}
+        for repo_name, prs, _ in chunk:
             try:
-                import json
-                import re
-                
-                # Clean up the response - remove "json" prefix and code block markers
-                cleaned_json = summary_json.strip()
-                cleaned_json = re.sub(r'^json\s*', '', cleaned_json)
-                cleaned_json = re.sub(r'^```json\s*', '', cleaned_json)
-                cleaned_json = re.sub(r'\s*```$', '', cleaned_json)
-                
-                data = json.loads(cleaned_json.strip())
-                
-                # Create formatted Slack message with better visual separation
-                formatted_summary = f"*{repo_name}*\n"
-                
-                for category in data.get('categories', []):
-                    category_name = category.get('name', '')
-                    items = category.get('items', [])
-                    
-                    if items:
-                        formatted_summary += f"\n• *{category_name}*:\n"
-                        for item in items:
-                            formatted_summary += f"  ◦ {item}\n"
-                
-                # Add visual separator at the end
-                formatted_summary += "\n" + "─" * 50 + "\n"
-                
-                return formatted_summary
-                
-            except (json.JSONDecodeError, KeyError, TypeError) as e:
-                logger.warning(f"Failed to parse JSON for {repo_name}, falling back to raw text: {e}")
-                # Fallback to raw text if JSON parsing fails
-                return f"*{repo_name}*:\n\n{summary_json}"
+                formatted_summary = self._format_categories(data[repo_name])
+            except (KeyError, TypeError, AttributeError) as e:
+                logger.warning(f"No usable summary for {repo_name} in AI response: {e}")
+                summaries[repo_name] = self._fallback_summary(prs)
+                continue
+            self.summary_cache.set(self._cache_key(repo_name, prs), formatted_summary)
+            summaries[repo_name] = formatted_summary
+        return summaries
+    
+    async def _summarize_chunk(self, chunk: List[Tuple[str, List[PullRequest], str]]) -> Dict[str, str]:
+        """
+        Summarize a chunk of repositories with one AI request.
+        
+        Args:
+            chunk: Repositories to summarize, with their formatted PR text
+            
+        Returns:
+            Dictionary mapping repository name to summary
+        """
+        repo_names = [repo_name for repo_name, _, _ in chunk]
+        try:
+            user_prompt = self._build_user_prompt(chunk)
+            max_tokens = SUMMARY_MAX_TOKENS * len(chunk)
+            if self.progress is None:
+                summary_json = await self.ai_provider.generate_summary(
+                    RELEASE_NOTES_SYSTEM_PROMPT, user_prompt, max_tokens=max_tokens
+                )
+            else:
+                summary_json = await self._stream_summary(repo_names, user_prompt, max_tokens)
+            summaries = self._format_summaries(chunk, summary_json)
             
         except Exception as e:
-            logger.error(f"AI provider error for {repo_name}: {e}")
+            logger.error(f"AI provider error for {', '.join(repo_names)}: {e}")
             # Fallback to basic summary
-            return f"*{repo_name}*: {len(prs_text.split('PR #')) - 1} pull requests merged. See individual PRs for details."
+            summaries = {repo_name: self._fallback_summary(prs) for repo_name, prs, _ in chunk}
+        
+        if self.progress is not None:
+            await self.progress.update(repo_names, "done")
+        return summaries
+    
+    async def _stream_summary(self, repo_names: List[str], user_prompt: str, max_tokens: int) -> str:
+        """
+        Generate a summary by streaming, reporting progress to the Slack progress message.
+        
+        Args:
+            repo_names: Repositories covered by the request
+            user_prompt: User prompt for the AI provider
+            max_tokens: Maximum tokens for the response
+            
+        Returns:
+            Accumulated AI response
+        """
+        chunks = []
+        received = 0
+        async for delta in self.ai_provider.stream_summary(RELEASE_NOTES_SYSTEM_PROMPT, user_prompt, max_tokens=max_tokens):
+            chunks.append(delta)
+            received += len(delta)
+            await self.progress.update(repo_names, f"generating ({received} characters received)")
+        
+        summary = "".join(chunks).strip()
+        return summary or "Unable to generate summary."
+    
+    async def _summarize_batch(self, chunks: List[List[Tuple[str, List[PullRequest], str]]]) -> Dict[str, str]:
+        """
+        Summarize chunks of repositories in a single provider batch job.
+        
+        Batch jobs are billed at a discount but complete asynchronously, which
+        suits scheduled runs where latency does not matter.
+        
+        Args:
+            chunks: Chunks of repositories to summarize
+            
+        Returns:
+            Dictionary mapping repository name to summary
+        """
+        # Batch custom IDs may not contain '/', so key requests by position
+        requests = [
+            (f"chunk-{index}", RELEASE_NOTES_SYSTEM_PROMPT, self._build_user_prompt(chunk))
+            for index, chunk in enumerate(chunks)
+        ]
+        max_tokens = SUMMARY_MAX_TOKENS * max(len(chunk) for chunk in chunks)
+        
+        try:
+            results = await self.ai_provider.generate_summaries_batch(requests, max_tokens=max_tokens)
+        except Exception as e:
+            logger.error(f"AI provider batch error: {e}")
+            results = {}
+        
+        summaries = {}
+        for (custom_id, _, _), chunk in zip(requests, chunks):
+            if custom_id in results:
+                summaries.update(self._format_summaries(chunk, results[custom_id]))
+            else:
+                logger.warning(f"No batch result for {', '.join(repo_name for repo_name, _, _ in chunk)}, using basic summary")
+                summaries.update({repo_name: self._fallback_summary(prs) for repo_name, prs, _ in chunk})
+        return summaries
+    
+    async def summarize_with_ai(self, repo_prs: List[Tuple[str, List[PullRequest]]]) -> Dict[str, str]:
+        """
+        Use AI to summarize pull requests for several repositories.
+        
+        Repositories are consolidated into as few requests as possible so the
+        system prompt is paid once per request rather than once per repository.
+        Summaries are cached on disk by PR set, so reruns over the same pull
+        requests skip the AI call.
+        
+        Args:
+            repo_prs: List of (repository name, pull requests)
+            
+        Returns:
+            Dictionary mapping repository name to AI-generated summary
+        """
+        summaries = {}
+        pending = []
+        for repo_name, prs in repo_prs:
+            if not prs:
+                summaries[repo_name] = "No changes in the specified time period."
+                continue
+            cached = self.summary_cache.get(self._cache_key(repo_name, prs))
+            if cached is not None:
+                logger.info(f"Using cached summary for {repo_name}")
+                summaries[repo_name] = cached
+            else:
+                pending.append((repo_name, prs))
+        
+        if self.progress is not None and summaries:
+            await self.progress.update(list(summaries), "done")
+        
+        chunks = self._chunk_repo_prs(pending)
+        if not chunks:
+            return summaries
+        logger.info(f"Summarizing {len(pending)} repositories in {len(chunks)} AI request(s)")
+        
+        # Generate summaries, either through a batch job or concurrent requests
+        if self.use_batch:
+            summaries.update(await self._summarize_batch(chunks))
+        else:
+            for chunk_summaries in await asyncio.gather(*(self._summarize_chunk(chunk) for chunk in chunks)):
+                summaries.update(chunk_summaries)
+        return summaries
     
-    def post_to_slack(self, message: str, date_range: Optional[str] = None) -> None:
+    def _header_text(self, date_range: Optional[str] = None) -> str:
+        """Release notes header, with the date range if provided."""
+        header_text = "📰 Release Notes"
+        if date_range:
+            header_text += f" ({date_range})"
+        return header_text
+    
+    def _format_message(self, sections: List[Tuple[str, str]]) -> str:
+        """Join repository sections into a single mrkdwn message."""
+        return "\n\n".join(f"*{repo_name}*\n{body}" for repo_name, body in sections)
+    
+    async def post_to_slack(self, sections: List[Tuple[str, str]], date_range: Optional[str] = None) -> None:
         """
-        Post message to Slack channel with beautiful formatting.
+        Post release notes to Slack channel with beautiful formatting.
+        
+        In streaming mode the progress message is replaced instead of posting
+        a new message.
         
         Args:
-            message: Message to post
+            sections: List of (repository name, formatted release notes)
             date_range: Date range string to include in header
         """
         try:
             # Create a simple text version for accessibility
-            text_version = message.replace('*', '').replace('•', '-').replace('◦', '  -').replace('─', '-')
-            
-            # Split message into repository sections (separated by the visual divider)
-            sections = message.split('─' * 50)
+            text_version = self._format_message(sections).translate(_SLACK_TEXT_TABLE)
             
             # Create header with date range if provided
-            header_text = "📰 Release Notes"
-            if date_range:
-                header_text += f" ({date_range})"
+            header_text = self._header_text(date_range)
             
             blocks = [
                 {
@@ -388,48 +888,49 @@ Create user-facing release notes following the format and guidelines above."""
                 }
             ]
             
-            for section in sections:
-                section = section.strip()
-                if section:
-                    # Split section into lines to extract repo name
-                    lines = section.split('\n')
-                    if lines and lines[0].startswith('*') and lines[0].endswith('*'):
-                        # Extract repo name and create a header
-                        repo_name = lines[0].strip('*')
-                        
-                        # Add repository header
-                        blocks.append({
-                            "type": "header",
-                            "text": {
-                                "type": "plain_text",
-                                "text": repo_name,
-                                "emoji": False
-                            }
-                        })
-                        
-                        # Add the rest of the content
-                        content = '\n'.join(lines[1:]).strip()
-                        if content:
-                            blocks.append({
-                                "type": "section",
-                                "text": {
-                                    "type": "mrkdwn",
-                                    "text": content
-                                }
-                            })
-                        
-                        # Add divider between repositories
-                        blocks.append({
-                            "type": "divider"
-                        })
+            for repo_name, body in sections:
+                # Add repository header
+                blocks.append({
+                    "type": "header",
+                    "text": {
+                        "type": "plain_text",
+                        "text": repo_name,
+                        "emoji": False
+                    }
+                })
+                
+                # Add the release notes
+                content = body.strip()
+                if content:
+                    blocks.append({
+                        "type": "section",
+                        "text": {
+                            "type": "mrkdwn",
+                            "text": content
+                        }
+                    })
+                
+                # Add divider between repositories
+                blocks.append({
+                    "type": "divider"
+                })
             
-            response = self.slack_client.chat_postMessage(
-                channel=self.slack_channel,
-                text=text_version,  # Required for accessibility
-                blocks=blocks,
-                unfurl_links=False
-            )
-            logger.info(f"Message posted to Slack channel {self.slack_channel}: {response['ts']}")
+            if self.progress is not None and self.progress.ts is not None:
+                response = await self.slack_client.chat_update(
+                    channel=self.progress.channel_id,
+                    ts=self.progress.ts,
+                    text=text_version,  # Required for accessibility
+                    blocks=blocks
+                )
+                logger.info(f"Message updated in Slack channel {self.slack_channel}: {response['ts']}")
+            else:
+                response = await self.slack_client.chat_postMessage(
+                    channel=self.slack_channel,
+                    text=text_version,  # Required for accessibility
+                    blocks=blocks,
+                    unfurl_links=False
+                )
+                logger.info(f"Message posted to Slack channel {self.slack_channel}: {response['ts']}")
             
         except SlackApiError as e:
             logger.error(f"Slack API error: {e.response['error']}")
@@ -438,7 +939,89 @@ Create user-facing release notes following the format and guidelines above."""
             logger.error(f"Error posting to Slack: {e}")
             raise
     
-    def generate_release_notes(self, repos: List[str], days_back: int) -> None:
+    def _write_message_file(self, message: str) -> None:
+        """
+        Write the message file atomically, skipping the write if it is unchanged.
+        
+        Args:
+            message: Message to write
+        """
+        data = message.encode("utf-8")
+        
+        try:
+            with open(MESSAGE_FILE, "rb") as f:
+                if f.read() == data:
+                    logger.info(f"{MESSAGE_FILE} is unchanged, skipping write")
+                    return
+        except FileNotFoundError:
+            pass
+        
+        tmp_path = f"{MESSAGE_FILE}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, MESSAGE_FILE)
+    
+    async def _collect_sections(self, repos: List[str], since_date: datetime) -> List[Tuple[str, str]]:
+        """
+        Fetch and summarize the merged pull requests of all repositories.
+        
+        Args:
+            repos: List of repository names
+            since_date: Date to look back from
+            
+        Returns:
+            List of (repository name, formatted release notes)
+        """
+        # Fetch PRs for all repositories concurrently, bounded to respect API rate limits
+        semaphore = asyncio.Semaphore(REPO_CONCURRENCY)
+        
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+        
+        fetched = await asyncio.gather(
+            *(bounded(self.get_merged_prs(repo, since_date)) for repo in repos),
+            return_exceptions=True
+        )
+        
+        # Only regular PRs are summarized; repos without any skip the AI entirely
+        summaries: Dict[str, str] = {}
+        deps_counts: Dict[str, int] = {}
+        repo_prs: List[Tuple[str, List[PullRequest]]] = []
+        for repo, result in zip(repos, fetched):
+            if isinstance(result, BaseException):
+                logger.error(f"Error processing repository {repo}: {result}")
+                summaries[repo] = f"Error processing repository - {str(result)}"
+                status = "error"
+            else:
+                filtered = self.filter_prs(result)
+                deps_counts[repo] = len(filtered['deps'])
+                if filtered['regular']:
+                    repo_prs.append((repo, filtered['regular']))
+                    continue
+                if filtered['deps']:
+                    # The dependency note below is the whole body
+                    summaries[repo] = ""
+                    status = "dependency updates only"
+                else:
+                    summaries[repo] = "No changes in the specified time period."
+                    status = "no changes"
+            if self.progress is not None:
+                await self.progress.update([repo], status)
+        
+        summaries.update(await self.summarize_with_ai(repo_prs))
+        
+        logger.info(f"Summary cache: {self.summary_cache.hits} hits, {self.summary_cache.misses} misses")
+        
+        sections = []
+        for repo in repos:
+            parts = [summaries[repo]]
+            if deps_counts.get(repo):
+                parts.append(f"• *Dependency Updates*: {deps_counts[repo]} dependency update(s) merged")
+            sections.append((repo, "\n\n".join(part for part in parts if part)))
+        return sections
+    
+    async def generate_release_notes(self, repos: List[str], days_back: int) -> None:
         """
         Main method to generate and post release notes.
         
@@ -455,57 +1038,57 @@ Create user-facing release notes following the format and guidelines above."""
         
         logger.info(f"Looking for PRs merged since {window_start.isoformat()}")
         
+        repos = list(dict.fromkeys(repo.strip() for repo in repos if repo.strip()))
         if not repos:
             logger.error("No repositories provided")
             return
         
-        all_summaries = []
+        # Test API connections up front only when asked; otherwise the first real
+        # call surfaces connection errors
+        if self.preflight:
+            await self._test_connections()
         
-        # Process each repository
-        for repo in repos:
-            repo = repo.strip()
-            if not repo:
-                continue
-                
-            try:
-                # Get merged PRs
-                prs = self.get_merged_prs(repo, window_start)
-                
-                if not prs:
-                    all_summaries.append(f"*{repo}*: No changes in the specified time period.")
-                    continue
+        # Show a progress message right away when streaming
+        if self.stream:
+            self.progress = SlackProgressMessage(
+                self.slack_client, self.slack_channel, self._header_text(date_range), repos
+            )
+            await self.progress.post()
+        
+        try:
+            sections = await self._collect_sections(repos, window_start)
+            
+            # Combine all summaries
+            if sections:
+                full_message = self._format_message(sections)
                 
-                # Format regular PRs
-                regular_prs_text = self.format_prs_for_summary(prs)
+                # Post to Slack
+                await self.post_to_slack(sections, date_range)
                 
-                # Generate summary
-                summary = self.summarize_with_ai(repo, regular_prs_text)
-                all_summaries.append(summary)
+                # Save message to file for action output
+                self._write_message_file(full_message)
                 
-            except Exception as e:
-                logger.error(f"Error processing repository {repo}: {e}")
-                all_summaries.append(f"*{repo}*: Error processing repository - {str(e)}")
-        
-        # Combine all summaries
-        if all_summaries:
-            full_message = "\n\n".join(all_summaries)
-            
-            # Post to Slack
-            self.post_to_slack(full_message, date_range)
-            
-            # Save message to file for action output
-            with open("generated_message.txt", "w") as f:
-                f.write(full_message)
-            
-            logger.info("Release notes generation completed successfully")
-        else:
-            logger.warning("No summaries generated")
+                logger.info("Release notes generation completed successfully")
+            else:
+                logger.warning("No summaries generated")
+        except Exception:
+            # Don't leave the progress message stuck on "Generating"
+            if self.progress is not None:
+                await self.progress.fail()
+            raise
 
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description="Generate release notes from GitHub PRs")
     parser.add_argument("--repos", required=True, help="Comma-separated list of <org>/<repo> strings")
     parser.add_argument("--days-back", type=int, default=7, help="Number of days to look back (default: 7)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--batch", action="store_true",
+                      help="Summarize through the AI provider's batch API (cheaper, but may take minutes to hours)")
+    mode.add_argument("--stream", action="store_true",
+                      help="Stream AI output and show generation progress in Slack")
+    parser.add_argument("--preflight", action="store_true",
+                        help="Test GitHub, Slack and AI provider connections before generating")
     
     args = parser.parse_args()
     
@@ -553,18 +1136,23 @@ def main():
     
     logger.info(f"Using repositories: {repos}")
     
-    try:
+    async def run():
         # Initialize generator with PAT authentication
-        generator = ReleaseNotesGenerator(
+        async with ReleaseNotesGenerator(
             slack_bot_token=slack_bot_token,
             slack_channel=slack_channel,
             ai_provider=ai_provider,
             ai_api_key=ai_api_key,
-            github_token=github_token
-        )
-        
-        # Generate release notes
-        generator.generate_release_notes(repos, args.days_back)
+            github_token=github_token,
+            use_batch=args.batch,
+            stream=args.stream,
+            preflight=args.preflight
+        ) as generator:
+            # Generate release notes
+            await generator.generate_release_notes(repos, args.days_back)
+    
+    try:
+        asyncio.run(run())
         
     except Exception as e:
         logger.error(f"Failed to generate release notes: {e}")
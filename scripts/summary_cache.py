@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Summary Cache
+
+This module provides a small on-disk cache for AI-generated summaries, so reruns
+over the same set of pull requests skip the AI call entirely.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Optional
+import logging
+
+# Optional faster JSON serializer, falling back to the standard library
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(value: Any) -> bytes:
+        return json.dumps(value).encode("utf-8")
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Default lifetime of cached summaries in seconds (7 days)
+DEFAULT_TTL = 7 * 86400
+
+class SummaryCache:
+    """File-per-key cache of summaries with expiry."""
+    
+    def __init__(self, directory: str, ttl: int = DEFAULT_TTL):
+        """
+        Initialize the cache.
+        
+        Args:
+            directory: Directory holding the cache entries
+            ttl: Lifetime of entries in seconds
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._prune()
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key from JSON-serializable parts.
+        
+        Args:
+            parts: Values identifying the cached content
+        
+        Returns:
+            Hex SHA-256 digest of the parts
+        """
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+    
+    def _prune(self) -> None:
+        """Delete expired and unreadable entries, so a persisted cache doesn't grow without bound."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        now = time.time()
+        removed = 0
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "rb") as f:
+                    expired = _json_loads(f.read())["expires_at"] <= now
+            except (OSError, ValueError, KeyError, TypeError):
+                expired = True
+            if expired:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError as e:
+                    logger.warning(f"Failed to remove cache entry {name}: {e}")
+        if removed:
+            logger.info(f"Pruned {removed} expired cache entries")
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached summary.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached summary, or None if missing or expired
+        """
+        try:
+            with open(self._path(key), "rb") as f:
+                entry = _json_loads(f.read())
+            if entry["expires_at"] > time.time():
+                self.hits += 1
+                return entry["value"]
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+        
+        self.misses += 1
+        return None
+    
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a summary in the cache.
+        
+        Args:
+            key: Cache key
+            value: Summary to store
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_json_dumps({"expires_at": time.time() + self.ttl, "value": value}))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key}: {e}")